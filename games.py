@@ -1,9 +1,37 @@
+import asyncio
 from datetime import datetime, timedelta
-import json
+import os
 import pickle
-import requests
+import re
 
+import aiohttp
+import orjson
 import numpy as np
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+
+# Reuse one session across game fetches so repeat GETs to the API host
+# skip the per-request TCP handshake. Responses (including 404s) are
+# cached to local SQLite; this covers one-off get_game calls and the
+# schedule scrape. The bulk season fetch goes through aiohttp instead
+# and gets its replay behavior from get_write_games skipping game ids
+# already written to disk.
+SESSION = CachedSession(
+    'nfl_cache', backend='sqlite', allowable_codes=(200, 404),
+    expire_after=None
+)
+SESSION.mount(
+    'http://', HTTPAdapter(pool_connections=8, pool_maxsize=32)
+)
+SESSION.headers['Connection'] = 'keep-alive'
+
+
+class GameNotFound(Exception):
+    """Raised when no game exists for a requested game id."""
+    pass
+
+
+VALID_MONTHS = frozenset({1, 2, 9, 10, 11, 12})
 
 
 def season_games_pipeline(season, url, months=[9, 10, 11, 12, 1, 2]):
@@ -27,39 +55,172 @@ def format_season_start_end(season):
     return start, end
 
 
-def get_write_games(season, url, months):
+def get_write_games(season, url, months, max_concurrency=16):
     """Get all of the game ids between start and end.
 
+    Candidate game ids for every day of the season are fetched
+    concurrently so that network latency overlaps across probes instead
+    of being paid serially per request. Games already written to
+    data/{season} are skipped, so replaying a season only probes ids
+    that have not been fetched yet.
+
     Arguments:
         season (int) - year corresponding to start of season
         url (str) - API URL to pull data from
+        months (list) - months of the season to pull games for
+        max_concurrency (int) - cap on in-flight requests
     """
     start, end = format_season_start_end(season)
+    try:
+        game_counts = get_season_game_counts(season)
+    except Exception as e:
+        print(e, 'falling back to weekday probe heuristic')
+        game_counts = {}
+    game_ids = [
+        game_id
+        for game_id in build_candidate_game_ids(start, end, months, game_counts)
+        if not os.path.exists('data/%i/%s.json' % (season, game_id))
+    ]
+    games = asyncio.run(fetch_games(game_ids, url, max_concurrency))
+    for game_id, game in games:
+        with open('data/%i/%s.json' % (season, game_id), 'wb') as game_file:
+            game_file.write(orjson.dumps(game))
+
+
+def build_probe_schedule(start, end, months=VALID_MONTHS, game_counts=None):
+    """Precompute the probe schedule for every day of a season.
+
+    Dates, weekdays, and month checks are resolved once per day here so
+    the fetch path never recomputes them. Dates with a known game count
+    (from the scraped schedule) probe exactly that many ids; other
+    dates fall back to the weekday heuristic of in-day ids 0 through 16
+    on Sundays and 0 through 5 in other valid months.
+
+    Arguments:
+        start (str) - season start date; 'YYYYMMDD'
+        end (str) - season end date; 'YYYYMMDD'
+        months (iterable) - months of the season to pull games for
+        game_counts (dict) - games played per 'YYYYMMDD' date
+
+    Returns:
+        schedule (list) - (game_date_str, max_in_day_id) tuples
+    """
+    months = frozenset(months)
+    game_counts = game_counts or {}
+    schedule = []
     game_date = datetime.strptime(start, '%Y%m%d')
-    while game_date <= datetime.strptime(end, '%Y%m%d'):
-        in_day_id = 0
-        failed = False
-        fail_count = 0
-        game_date_str = game_date.strftime('%Y%m%d')
-        while not failed and game_date.month in months:
-            try:
-                game_id = format_game_id(game_date_str, in_day_id)
-                game = get_game(game_id, url)
-                json.dump(
-                    game, open('data/%i/%s.json' % (season, game_id), 'w')
-                )
-                in_day_id += 1
-            except Exception as e:
-                print(e, format_game_id(game_date_str, in_day_id))
-                if game_date.weekday()==6 and in_day_id<=16 and fail_count<5:
-                    fail_count += 1
-                    in_day_id += 1
-                elif fail_count < 5:
-                    fail_count += 1
-                    in_day_id += 1
-                else:
-                    failed = True
+    end_date = datetime.strptime(end, '%Y%m%d')
+    while game_date <= end_date:
+        if game_date.month in months:
+            game_date_str = game_date.strftime('%Y%m%d')
+            if game_date_str in game_counts:
+                max_in_day_id = game_counts[game_date_str] - 1
+            else:
+                max_in_day_id = 16 if game_date.weekday() == 6 else 5
+            schedule.append((game_date_str, max_in_day_id))
         game_date += timedelta(days=1)
+    return schedule
+
+
+def build_candidate_game_ids(start, end, months, game_counts=None):
+    """List every candidate game_id between start and end.
+
+    Arguments:
+        start (str) - season start date; 'YYYYMMDD'
+        end (str) - season end date; 'YYYYMMDD'
+        months (iterable) - months of the season to pull games for
+        game_counts (dict) - games played per 'YYYYMMDD' date
+    """
+    game_ids = []
+    for game_date_str, max_in_day_id in build_probe_schedule(
+        start, end, months, game_counts
+    ):
+        for in_day_id in range(max_in_day_id + 1):
+            game_ids.append(format_game_id(game_date_str, in_day_id))
+    return game_ids
+
+
+def get_season_game_counts(season, schedule_path='data/schedule.pkl'):
+    """Get the number of games played on each date of a season.
+
+    Counts are scraped once per season from www.nfl.com/schedules and
+    pickled, so later runs skip both the scrape and the 404 probes for
+    game ids that were never played.
+
+    Arguments:
+        season (int) - year corresponding to start of season
+        schedule_path (str) - path of the pickled schedule table
+
+    Returns:
+        game_counts (dict) - games played per 'YYYYMMDD' date
+    """
+    try:
+        schedules = pickle.load(open(schedule_path, 'rb'))
+    except (IOError, EOFError):
+        schedules = {}
+    if season not in schedules:
+        schedules[season] = scrape_season_game_counts(season)
+        pickle.dump(schedules, open(schedule_path, 'wb'))
+    return schedules[season]
+
+
+def scrape_season_game_counts(season, n_weeks=17):
+    # Each weekly schedule page lists its game ids; count ids per date
+    # across the regular season.
+    game_counts = {}
+    for week in range(1, n_weeks + 1):
+        page = SESSION.get(
+            'http://www.nfl.com/schedules/{}/REG{}'.format(season, week),
+            timeout=10
+        )
+        for game_id in re.findall(r'data-gameid="(\d{10})"', page.text):
+            game_date_str = game_id[:8]
+            game_counts[game_date_str] = game_counts.get(game_date_str, 0) + 1
+    return game_counts
+
+
+async def fetch_games(game_ids, url, max_concurrency):
+    """Fetch all candidate game ids concurrently.
+
+    Arguments:
+        game_ids (list) - candidate game ids to probe
+        url (str) - API URL to pull data from
+        max_concurrency (int) - cap on in-flight requests
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    connector = aiohttp.TCPConnector(limit=32, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=timeout
+    ) as session:
+        tasks = [
+            fetch_game(session, semaphore, game_id, url)
+            for game_id in game_ids
+        ]
+        games = await asyncio.gather(*tasks)
+    return [(game_id, game) for game_id, game in games if game is not None]
+
+
+async def fetch_game(session, semaphore, game_id, url):
+    # Request game data; a 404 means no game was played with this id.
+    # Any other per-probe failure (timeout, reset, 5xx, bad JSON) is
+    # logged and skipped so one bad probe cannot abort a whole season.
+    async with semaphore:
+        try:
+            async with session.get(
+                '{url}{game_id}/{game_id}_gtd.json'.format(
+                    url=url, game_id=game_id
+                )
+            ) as response:
+                if response.status != 200:
+                    if response.status != 404:
+                        print(game_id, 'status', response.status)
+                    return game_id, None
+                game_dict = await response.json(content_type=None)
+                return game_id, game_dict
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(game_id, e)
+            return game_id, None
 
 
 def format_game_id(game_date_str, in_day_id):
@@ -79,12 +240,13 @@ def format_game_id(game_date_str, in_day_id):
 
 def get_game(game_id, url):
     # Request game data from NFL Game Center API.
-    game = requests.get(
-        '{url}{game_id}/{game_id}_gtd.json'.format(url=url, game_id=game_id)
+    game = SESSION.get(
+        '{url}{game_id}/{game_id}_gtd.json'.format(url=url, game_id=game_id),
+        timeout=10
     )
-    if game.reason == 'Not Found':
-        raise Exception('Game ID {} not found.'.format(game_id))
-    game_dict = json.loads(game.text)
+    if game.status_code == 404:
+        raise GameNotFound('Game ID {} not found.'.format(game_id))
+    game_dict = orjson.loads(game.content)
     return game_dict
 
 
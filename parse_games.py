@@ -1,18 +1,21 @@
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-import json
+import mmap
 import os
 
+import ijson
 import numpy as np
 import pandas as pd
 
 
 def game_data_pipeline(start_season, end_season, data_path):
     """Get game data."""
-    df = pd.DataFrame()
+    season_frames = []
     for season in range(start_season, end_season + 1):
         season_data = parse_season_games(season, data_path)
-        sdf = pd.DataFrame(season_data)
-        df = pd.concat((df, sdf))
+        season_frames.append(pd.DataFrame(season_data, copy=False))
+    df = pd.concat(season_frames, ignore_index=True, copy=False)
+    df = format_yard_lines(df)
     return df
 
 
@@ -27,96 +30,159 @@ def parse_season_games(season, data_path):
         season_data (dict)
     """
     season_game_files = get_season_game_list(season, data_path)
-    parsed_season_data = []
-    for filename in season_game_files:
-        try:
-            game_path = '{}/{}/{}'.format(data_path, season, filename)
-            game_data = json.load(open(game_path, 'r'))
-            game_id = filename.replace('.json', '')
-            parsed_game_data = parse_game(game_data, game_id)
-            parsed_season_data.extend(parsed_game_data)
-        except Exception as e:
-            print(filename, e)
-    return parsed_season_data
+    season_columns = new_drive_columns()
+    parse_args = [
+        (season, data_path, filename) for filename in season_game_files
+    ]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for game_columns in executor.map(
+            parse_game_file, parse_args, chunksize=16
+        ):
+            for column in DRIVE_COLUMNS:
+                season_columns[column].extend(game_columns[column])
+    return season_columns
+
+
+def parse_game_file(args):
+    # Read and parse a single game file; games are independent, so files
+    # fan out across worker processes.
+    season, data_path, filename = args
+    try:
+        game_path = '{}/{}/{}'.format(data_path, season, filename)
+        game_id = filename.replace('.json', '')
+        with open(game_path, 'rb') as game_file, mmap.mmap(
+            game_file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as game_map:
+            game_data = load_game(game_map, game_id)
+        return parse_game(game_data, game_id)
+    except Exception as e:
+        print(filename, e)
+        return new_drive_columns()
+
+
+DRIVE_COLUMNS = (
+    'game_id', 'offensive_team', 'defensive_team', 'home_team', 'away_team',
+    'start_quarter', 'start_time', 'start_yard_line_raw', 'yards_gained',
+    'penalty_yards', 'end_quarter', 'end_time', 'result', 'n_plays',
+    'drive_time', 'first_play_desc', 'last_play_desc', 'home_final_score',
+    'away_final_score', 'home_score_diff_last_quarter'
+)
+
+
+def new_drive_columns():
+    # One list per drive column; appending into columns skips the
+    # per-drive dict allocation and lets pandas build the DataFrame
+    # without a row-to-column transpose.
+    return {column: [] for column in DRIVE_COLUMNS}
+
+
+def load_game(game_file, game_id):
+    """Stream-parse only the subtrees of a game document that we use.
+
+    A full _gtd.json document also carries per-player stats, score
+    summaries, and media fields that parse_game never touches; iterating
+    top-level keys lazily keeps peak memory at the largest single
+    subtree instead of the whole document.
+
+    Arguments:
+        game_file (file) - game JSON file opened in binary mode
+        game_id (str) - game id; the document's single top-level key
+    """
+    game = {}
+    for key, value in ijson.kvitems(game_file, game_id):
+        if key == 'drives':
+            game['drives'] = value
+        elif key in ('home', 'away'):
+            game[key] = {'abbr': value['abbr'], 'score': value['score']}
+    return {game_id: game}
 
 
 def get_season_game_list(season, data_path):
     season_path = '{}/{}'.format(data_path, season)
-    game_list = os.listdir(season_path)
+    with os.scandir(season_path) as entries:
+        game_list = [
+            entry.name for entry in entries if entry.name.endswith('.json')
+        ]
     return game_list
 
 
 def parse_game(game_data, game_id):
-    # Parse game into drive level data -- TODO: play by play data.
+    # Parse game into drive level columns -- TODO: play by play data.
     game = game_data[game_id]
     home = game['home']['abbr']
     away = game['away']['abbr']
+    home_final_score = game['home']['score']['T']
+    away_final_score = game['away']['score']['T']
     drives = game['drives']
-    game_drives = []
+    columns = new_drive_columns()
     for i in range(1, 1 + drives['crntdrv']):
         drive = drives.get(str(i), None)
         if not drive:
             continue
+        # Bind the nested dicts once; the column appends below would
+        # otherwise re-hash the same keys several times per drive.
+        start = drive['start']
+        end = drive['end']
+        plays = drive['plays']
         offensive_team = drive['posteam']
-        defensive_team = home if home != drive['posteam'] else away
+        defensive_team = home if home != offensive_team else away
         try:
-            first_play_key = str(
-                min([int(key) for key in drive['plays'].keys()])
-            )
-            last_play_key = str(
-                max([int(key) for key in drive['plays'].keys()])
-            )
+            play_keys = [int(key) for key in plays]
+            first_play_key = str(min(play_keys))
+            last_play_key = str(max(play_keys))
         except Exception as e:
-            print(e, drive['plays'].keys())
+            print(e, plays.keys())
             continue
-        drive_dict = dict(
-            game_id=game_id,
-            offensive_team=offensive_team,
-            defensive_team=defensive_team,
-            home_team=home,
-            away_team=away,
-            start_quarter=drive['start']['qtr'],
-            start_time=drive['start']['time'],
-            start_yard_line=format_yardline(drive['start'], offensive_team),
-            yards_gained=drive['ydsgained'],
-            penalty_yards=drive['penyds'],
-            end_quarter=drive['end']['qtr'],
-            end_time=drive['end']['time'],
-            result=drive['result'],
-            n_plays=drive['numplays'],
-            drive_time=drive['postime'],
-            first_play_desc=drive['plays'][first_play_key]['desc'],
-            last_play_desc=drive['plays'][last_play_key]['desc'],
-            home_final_score=game['home']['score']['T'],
-            away_final_score=game['away']['score']['T'],
-            home_score_diff_last_quarter=format_score_differential(game, drive)
+        columns['game_id'].append(game_id)
+        columns['offensive_team'].append(offensive_team)
+        columns['defensive_team'].append(defensive_team)
+        columns['home_team'].append(home)
+        columns['away_team'].append(away)
+        columns['start_quarter'].append(start['qtr'])
+        columns['start_time'].append(start['time'])
+        columns['start_yard_line_raw'].append(start['yrdln'])
+        columns['yards_gained'].append(drive['ydsgained'])
+        columns['penalty_yards'].append(drive['penyds'])
+        columns['end_quarter'].append(end['qtr'])
+        columns['end_time'].append(end['time'])
+        columns['result'].append(drive['result'])
+        columns['n_plays'].append(drive['numplays'])
+        columns['drive_time'].append(drive['postime'])
+        columns['first_play_desc'].append(plays[first_play_key]['desc'])
+        columns['last_play_desc'].append(plays[last_play_key]['desc'])
+        columns['home_final_score'].append(home_final_score)
+        columns['away_final_score'].append(away_final_score)
+        columns['home_score_diff_last_quarter'].append(
+            format_score_differential(game, drive)
         )
-        game_drives.append(drive_dict)
-    return game_drives
+    return columns
+
 
+def format_yard_lines(df):
+    """Format raw yard line strings as integers from 0 to 100.
 
-def format_yardline(start, team):
-    # Format the yard line as an integer from 0 to 100.
-    yard_line_str = start['yrdln']
-    if yard_line_str == '50':
-        return 50
-    elif yard_line_str:
-        side_of_field, yard_line_str = yard_line_str.split(' ')
-        if side_of_field == team:
-            return int(yard_line_str)
-        else:
-            return 100 - int(yard_line_str)
-    else:
-        return np.nan
+    Raw values look like 'PIT 42' (or '50' at midfield); the number
+    counts up from the offense's own goal line when they are on their
+    own side of the field. Splitting and comparing whole columns at
+    once replaces a per-drive Python call with a few vectorized passes.
+    """
+    split = df['start_yard_line_raw'].str.split(' ', n=1, expand=True)
+    side_of_field = split[0]
+    yard_line = pd.to_numeric(split[1], errors='coerce')
+    df['start_yard_line'] = np.where(
+        side_of_field == df['offensive_team'], yard_line, 100 - yard_line
+    )
+    df.loc[df['start_yard_line_raw'] == '50', 'start_yard_line'] = 50
+    df = df.drop('start_yard_line_raw', axis=1)
+    return df
 
 
 def format_score_differential(game, drive):
     # Get score differential (home - away) at end of previous quarter.
     start_quarter = drive['start']['qtr']
-    # print(start_quarter, type(start_quarter))
     if str(start_quarter) == '1':
         return 0
     quarters = range(1, start_quarter)
-    home_scores = [game['home']['score'][str(quarter)] for quarter in quarters]
-    away_scores = [game['away']['score'][str(quarter)] for quarter in quarters]
-    return str(np.sum(home_scores) - np.sum(away_scores))
+    home_score = sum(game['home']['score'][str(q)] for q in quarters)
+    away_score = sum(game['away']['score'][str(q)] for q in quarters)
+    return home_score - away_score
@@ -1,9 +1,11 @@
 from collections import defaultdict
 from functools import partial
 import json
+import os
 
 import numpy as np
 import pandas as pd
+from numba import njit
 
 from parse_games import game_data_pipeline
 
@@ -33,23 +35,81 @@ def get_drive_stats(start_season, end_season, exclude_playoffs=False,
 
 def opponent_strength_adjustment(df, n_iters=5, step_size=.2):
     # MAKE ADJUSTMENT BASED ON OPPONENT STRENGTH...
-    df['adj_offensive_score'] = df['drive_score']
-    df['adj_defensive_score'] = df['drive_score']
-    for i in range(n_iters):
-        df['offensive_adj'] = df.groupby(['season', 'defensive_team'])\
-            ['adj_defensive_score'].transform('mean')
-        df['defensive_adj'] = df.groupby(['season', 'offensive_team'])\
-            ['adj_offensive_score'].transform('mean')
-        df['adj_offensive_score'] = (
-            df['adj_offensive_score'] - (step_size * df['offensive_adj'])
-        )
-        df['adj_defensive_score'] = (
-            df['adj_defensive_score'] - (step_size * df['defensive_adj'])
-        )
-    df = df.drop(['offensive_adj', 'defensive_adj'], axis=1)
+    # Factorize the (season, team) keys once so each iteration is two
+    # bincount reductions plus a gather instead of rebuilding a groupby
+    # and re-hashing the composite keys.
+    season = df['season'].astype(str)
+    def_codes, _ = pd.factorize(
+        season + '_' + df['defensive_team'].astype(str), sort=False
+    )
+    off_codes, _ = pd.factorize(
+        season + '_' + df['offensive_team'].astype(str), sort=False
+    )
+    drive_score = df['drive_score'].to_numpy(dtype=np.float64)
+    adj_offensive, adj_defensive = fit_opponent_adjustment(
+        off_codes, def_codes, drive_score, n_iters, step_size,
+        off_codes.max() + 1, def_codes.max() + 1
+    )
+    # The fixed point runs in float64 for stability; float32 is plenty
+    # for the stored scores.
+    df['adj_offensive_score'] = adj_offensive.astype(np.float32)
+    df['adj_defensive_score'] = adj_defensive.astype(np.float32)
     return df
 
 
+@njit(cache=True)
+def fit_opponent_adjustment(off_codes, def_codes, drive_score, n_iters,
+                            step_size, n_off, n_def):
+    """Run the opponent-strength fixed point as one compiled kernel.
+
+    Both per-group reductions and the gather/update pass fuse into
+    tight loops with no per-iteration array temporaries. The kernel
+    stays serial: the scatter adds into the group sums would race
+    under prange, and fastmath would reorder the summations and drift
+    the results. NaN scores are excluded from the group means and come
+    out NaN, matching the groupby transform this replaced.
+    """
+    adj_offensive = drive_score.copy()
+    adj_defensive = drive_score.copy()
+    n_drives = drive_score.shape[0]
+    # One set of group buffers reused across iterations; refilling with
+    # zeros keeps the pages hot instead of re-allocating each pass.
+    off_sums = np.zeros(n_off)
+    off_counts = np.zeros(n_off)
+    def_sums = np.zeros(n_def)
+    def_counts = np.zeros(n_def)
+    for iteration in range(n_iters):
+        off_sums[:] = 0.0
+        off_counts[:] = 0.0
+        def_sums[:] = 0.0
+        def_counts[:] = 0.0
+        # Some drives have no drive_score (their field position points
+        # cannot be computed); the groupby transform this replaced
+        # skipped those rows, so keep them out of the group means here
+        # too -- one NaN must not poison its (season, team) group.
+        for i in range(n_drives):
+            if np.isfinite(adj_offensive[i]):
+                off_sums[off_codes[i]] += adj_offensive[i]
+                off_counts[off_codes[i]] += 1.0
+            if np.isfinite(adj_defensive[i]):
+                def_sums[def_codes[i]] += adj_defensive[i]
+                def_counts[def_codes[i]] += 1.0
+        for i in range(n_drives):
+            if def_counts[def_codes[i]] > 0.0:
+                adj_offensive[i] -= step_size * (
+                    def_sums[def_codes[i]] / def_counts[def_codes[i]]
+                )
+            else:
+                adj_offensive[i] = np.nan
+            if off_counts[off_codes[i]] > 0.0:
+                adj_defensive[i] -= step_size * (
+                    off_sums[off_codes[i]] / off_counts[off_codes[i]]
+                )
+            else:
+                adj_defensive[i] = np.nan
+    return adj_offensive, adj_defensive
+
+
 def get_side_columns(side):
     if side == 'offensive_team':
         columns = ['adj_offensive_score', 'drive_score']
@@ -59,15 +119,66 @@ def get_side_columns(side):
 
 
 def get_drives(start_season, end_season, exclude_playoffs, data_path):
-    df = game_data_pipeline(start_season, end_season, data_path)
+    season_frames = [
+        load_season_drives(season, data_path)
+        for season in range(start_season, end_season + 1)
+    ]
+    df = pd.concat(season_frames, ignore_index=True, copy=False)
     df = preprocess_drives(df, exclude_playoffs)
     return df
 
 
+def load_season_drives(season, data_path):
+    """Load one season of drive data, preferring the Parquet cache.
+
+    The first load of a season parses the game JSON and writes
+    {season}_drives.parquet; later loads are a single columnar read
+    instead of Python-level JSON parsing.
+    """
+    parquet_path = '{}/{}_drives.parquet'.format(data_path, season)
+    if os.path.exists(parquet_path):
+        return pd.read_parquet(parquet_path, engine='pyarrow')
+    return cache_drives_parquet(season, data_path)
+
+
+def cache_drives_parquet(season, data_path):
+    """Build a season's drive frame and cache it as Parquet.
+
+    Seasons with raw game files are parsed through game_data_pipeline;
+    otherwise an older season-level {season}_drives.json dump is read.
+    The legacy dumps came from json.dump, so they contain bare NaN
+    tokens (which orjson rejects) and stringified score differentials
+    -- stdlib json and a to_numeric pass handle both quirks.
+    """
+    season_path = '{}/{}'.format(data_path, season)
+    if os.path.isdir(season_path) and os.listdir(season_path):
+        sdf = game_data_pipeline(season, season, data_path)
+    else:
+        season_json_path = '{}/{}_drives.json'.format(data_path, season)
+        with open(season_json_path, 'rb') as season_file:
+            sdf = pd.DataFrame(json.load(season_file), copy=False)
+        sdf['home_score_diff_last_quarter'] = pd.to_numeric(
+            sdf['home_score_diff_last_quarter']
+        )
+    # Convert possession time to minutes once at cache time, so every
+    # later load reads a ready-to-use float32 column straight off disk.
+    # start_time and end_time stay as clock strings: mark_playoffs
+    # sorts on and flags the raw '15:00' values before handle_drive_time
+    # converts them.
+    sdf['drive_time'] = convert_game_time(sdf['drive_time']).astype(
+        np.float32
+    )
+    sdf.to_parquet(
+        '{}/{}_drives.parquet'.format(data_path, season), engine='pyarrow',
+        compression='zstd', use_dictionary=True
+    )
+    return sdf
+
+
 def preprocess_drives(df, exclude_playoffs):
     """Preprocess drives for analysis."""
     df['drive_id'] = df.index
-    df['season'] = df['game_id'].map(get_season)
+    df['season'] = get_season(df['game_id'])
 
     if 'home_score' in df.columns:
         df['home_final_score'] = df['home_score']
@@ -76,18 +187,32 @@ def preprocess_drives(df, exclude_playoffs):
 
     df = clean_games(df)
     df = mark_playoffs(df)
+    # An Arrow-backed result column makes the repeated result equality
+    # and isin masks in the scoring functions run on native kernels
+    # instead of object arrays. last_play_desc stays object: its only
+    # consumer is scan_play_descriptions, which loops Python str.find
+    # over to_numpy(), so an Arrow cast would be a round trip for
+    # nothing.
+    df['result'] = df['result'].astype('string[pyarrow]')
     if exclude_playoffs:
         df = df.loc[df['is_playoffs'] == 0].copy()
 
-    df = mark_offensive_scores(df)
-    df = mark_dst_scores(df)
+    extra_point_mask, two_point_mask, touchdown_mask = (
+        scan_play_descriptions(df['last_play_desc'].to_numpy())
+    )
+    df = mark_offensive_scores(df, extra_point_mask, two_point_mask)
+    df = mark_dst_scores(df, touchdown_mask)
     df = get_current_score(df)
     df = format_final_scores(df)
     df = add_win_loss(df)
     df = handle_drive_time(df)
 
-    df['offense_home'] = df['offensive_team'] == df['home_team']
-    df['defense_home'] = df['defensive_team'] == df['home_team']
+    df['offense_home'] = (
+        df['offensive_team'] == df['home_team']
+    ).astype(np.int8)
+    df['defense_home'] = (
+        df['defensive_team'] == df['home_team']
+    ).astype(np.int8)
     return df
 
 
@@ -101,27 +226,40 @@ def postprocess_drives(df):
     df = bin_yard_lines(df, binned_column='next_start_yard_line', prefix='next_start')
     df = add_field_goal_points(df)
     df = add_field_position_points(df)
-    df['nfl_avg_score'] = df.groupby('start_yard_line_bin')\
+    df['nfl_avg_score'] = df.groupby('start_yard_line_bin', observed=True)\
         ['drive_score'].transform('mean')
-    df['drive_score'] = df['drive_score'] - df['nfl_avg_score']
+    df['drive_score'] = (df['drive_score'] - df['nfl_avg_score']).astype(
+        np.float32
+    )
     return df
 
 
 def handle_drive_time(df):
-    df['drive_time'] = df['drive_time'].map(convert_game_time)
-    df['start_time'] = df['start_time'].map(convert_game_time)
-    df['end_time'] = df['end_time'].map(convert_game_time)
+    df['drive_time'] = convert_game_time(df['drive_time'])
+    df['start_time'] = convert_game_time(df['start_time'])
+    df['end_time'] = convert_game_time(df['end_time'])
     for quarter in range(1, 6):
         quarter_time_func = partial(quarter_possession_time, quarter=quarter)
         df['%i_quarter_time' % quarter] = df.apply(quarter_time_func, axis=1)
     return df
 
 
-def convert_game_time(drive_time):
-    if drive_time:
-        minutes, seconds = [int(t) for t in drive_time.split(':')]
-        return minutes + seconds / 60
-    return None
+def convert_game_time(times):
+    """Convert a column of 'MM:SS' strings to fractional minutes.
+
+    One C-level split over the whole column replaces a Python call per
+    row; missing or empty times come out as NaN.
+
+    Arguments:
+        times (Series) - game clock strings; 'MM:SS'
+    """
+    if pd.api.types.is_numeric_dtype(times):
+        # Already converted when the season was cached to Parquet.
+        return times
+    parts = times.str.split(':', n=1, expand=True)
+    minutes = pd.to_numeric(parts[0], errors='coerce')
+    seconds = pd.to_numeric(parts[1], errors='coerce')
+    return minutes + seconds / 60
 
 
 def quarter_possession_time(row, quarter=1):
@@ -137,13 +275,21 @@ def quarter_possession_time(row, quarter=1):
 
 
 
-def get_season(game_id):
-    month = int(str(game_id)[4:6])
-    year = int(str(game_id)[:4])
-    if month > 8:
-        return year
-    else:
-        return year - 1
+def get_season(game_ids):
+    """Season each game id belongs to.
+
+    Game ids follow the YYYYMMDDNN convention, so the year and month
+    fall out of two integer divisions over the whole column instead of
+    per-row string slicing; games before September belong to the prior
+    year's season.
+
+    Arguments:
+        game_ids (Series) - game ids; 'YYYYMMDDNN'
+    """
+    gid = game_ids.astype(np.int64).to_numpy()
+    year = gid // 1000000
+    month = (gid // 10000) % 100
+    return year - (month <= 8)
 
 
 def clean_games(df):
@@ -154,7 +300,15 @@ def clean_games(df):
     ]
     team_map = {'STL': 'LA', 'SD': 'LAC', 'JAC': 'JAX'}
     for column in team_columns:
-        df[column] = df[column].map(lambda team: team_map.get(team, team))
+        df[column] = df[column].replace(team_map)
+    # One shared categorical dtype across the team columns: the many
+    # team == team masks and factorizations downstream then compare
+    # small integer codes instead of hashing strings.
+    team_cats = pd.CategoricalDtype(
+        sorted(pd.unique(df[team_columns].to_numpy().ravel()))
+    )
+    for column in team_columns:
+        df[column] = df[column].astype(team_cats)
     df['game_date'] = df['game_id'].map(get_game_date)
     df['game_date'] = pd.to_datetime(df['game_date'], format='%Y%m%d')
     df['day_of_week'] = df['game_date'].dt.day_name()
@@ -168,134 +322,228 @@ def get_game_date(game_id):
 def mark_playoffs(df):
     df = df.sort_values(['game_id', 'start_quarter', 'start_time'],
                         ascending=[True, True, False])
-    df['unique_game_flag'] = 0
-    firstplay_mask = (df['start_quarter'] == 1) & (df['start_time'] == '15:00')
-    df.loc[firstplay_mask, 'unique_game_flag'] = 1
-    group_games = df.groupby('season')
-    df['game_in_season'] = group_games['unique_game_flag'].transform('cumsum')
-    df['is_playoffs'] = 0
-    df.loc[df['game_in_season'] > 256, 'is_playoffs'] = 1
+    # Once sorted by game_id the seasons are contiguous, so the
+    # per-season game counter is one global cumsum minus each season's
+    # starting offset -- no hashed groupby transform needed.
+    flags = (
+        (df['start_quarter'].to_numpy() == 1) &
+        (df['start_time'].to_numpy() == '15:00')
+    ).astype(np.int8)
+    df['unique_game_flag'] = flags
+    game_counts = np.cumsum(flags)
+    seasons = df['season'].to_numpy()
+    season_starts = np.flatnonzero(seasons[1:] != seasons[:-1]) + 1
+    season_bases = np.zeros(len(df), dtype=game_counts.dtype)
+    season_bases[season_starts] = game_counts[season_starts - 1]
+    season_bases = np.maximum.accumulate(season_bases)
+    df['game_in_season'] = game_counts - season_bases
+    df['is_playoffs'] = (df['game_in_season'] > 256).astype(np.int8)
     return df
 
 
 def get_next_opponent_drive(df):
-    # Get the opponents next drive.
-    df['next_start_yard_line'] = df['start_yard_line'].shift(-1)
-    df['next_end_yard_line'] = df['end_yard_line'].shift(-1)
-    df['next_offensive_team'] = df['offensive_team'].shift(-1)
-    df['next_home_team'] = df['home_team'].shift(-1)
-    df['next_away_team'] = df['away_team'].shift(-1)
-    same_team_mask = df['offensive_team'] == df['next_offensive_team']
-    new_game_mask = (df['home_team'] != df['next_home_team']) | (df['away_team'] != df['next_away_team'])
-    df.loc[(same_team_mask) | (new_game_mask), 'next_start_yard_line'] = np.nan
-    df.loc[(same_team_mask) | (new_game_mask), 'next_end_yard_line'] = np.nan
-    df.loc[new_game_mask, 'next_offensive_team'] = np.nan
-    df = df.drop(['next_home_team', 'next_away_team'], axis=1)
+    """Get the opponent's next drive.
+
+    Drives sit in game order, so 'next' is each column shifted up one
+    row on the raw arrays. The validity masks (next row starts a new
+    game; same offense kept the ball) are computed once from the team
+    category codes and gate every shifted column with np.where instead
+    of per-column shifts and masked writes.
+    """
+    off_codes = df['offensive_team'].cat.codes.to_numpy()
+    home_codes = df['home_team'].cat.codes.to_numpy()
+    away_codes = df['away_team'].cat.codes.to_numpy()
+    new_game = np.empty(len(df), dtype=bool)
+    new_game[:-1] = (
+        (home_codes[:-1] != home_codes[1:]) |
+        (away_codes[:-1] != away_codes[1:])
+    )
+    new_game[-1] = True
+    bad = new_game.copy()
+    bad[:-1] |= off_codes[:-1] == off_codes[1:]
+    for column in ('start_yard_line', 'end_yard_line'):
+        values = df[column].to_numpy(dtype=float)
+        shifted = np.empty_like(values)
+        shifted[:-1] = values[1:]
+        shifted[-1] = np.nan
+        df['next_%s' % column] = np.where(bad, np.nan, shifted)
+    next_off_codes = np.empty_like(off_codes)
+    next_off_codes[:-1] = off_codes[1:]
+    next_off_codes[new_game] = -1
+    df['next_offensive_team'] = pd.Categorical.from_codes(
+        next_off_codes, dtype=df['offensive_team'].dtype
+    )
     return df
 
 
+BIN_LABELS = ['%i-%i' % (lower, lower + 10) for lower in range(0, 100, 10)]
+BIN_CATS = pd.CategoricalDtype(BIN_LABELS, ordered=True)
+
+
 def bin_yard_lines(df, binned_column, prefix):
-    # Bin yard lines into groups of five.
-    lower = np.arange(0, 100, 10)
-    upper = np.arange(10, 110, 10)
-    bins_list = list(zip(lower, upper))
-    bins = pd.IntervalIndex.from_tuples(bins_list)
-    df['%s_yard_line_bin' % prefix] = pd.cut(df[binned_column], bins)
-    df['%s_yard_line_bin' % prefix] = df['%s_yard_line_bin' % prefix].map(
-        lambda x: '%s-%s' % (x.left, x.right)
+    """Bin yard lines into groups of ten.
+
+    Bins are open on the left and closed on the right to match pd.cut,
+    e.g. a yard line of 40 falls in '30-40'. For fixed ten-yard bins
+    the bin code is pure arithmetic, so one vectorized ceil feeds
+    Categorical.from_codes directly -- no per-row label strings are
+    ever materialized; out-of-range codes become NaN via code -1.
+    """
+    yard_lines = df[binned_column].to_numpy(dtype=float)
+    bin_codes = np.ceil(yard_lines / 10) - 1
+    valid = (bin_codes >= 0) & (bin_codes <= 9)
+    bin_codes = np.where(valid, bin_codes, -1).astype(np.int8)
+    df['%s_yard_line_bin' % prefix] = pd.Categorical.from_codes(
+        bin_codes, dtype=BIN_CATS
     )
     return df
 
 
-def mark_offensive_scores(df):
+def to_human_labels(df):
+    """Materialize yard line bin columns as plain label strings.
+
+    The pipeline keeps bins as small-int categoricals so groupbys
+    bucket by code instead of hashing label strings; call this only
+    when exporting a frame for human-readable output.
+
+    Arguments:
+        df (DataFrame) - drive data with *_yard_line_bin columns
+    """
+    bin_columns = [
+        column for column in df.columns if column.endswith('_yard_line_bin')
+    ]
+    for column in bin_columns:
+        df[column] = df[column].astype(object)
+    return df
+
+
+def scan_play_descriptions(descriptions):
+    """Scan each last play description once for every scoring predicate.
+
+    The scoring functions need three predicates that were previously
+    five separate str.contains scans over the same column. One pass
+    with substring searches evaluates them together, preserving the
+    regex semantics: an event only counts when no REVERSED/NULLIFIED
+    follows its first occurrence.
+
+    Arguments:
+        descriptions (ndarray) - last play description per drive
+
+    Returns:
+        extra_point_mask, two_point_mask, touchdown_mask (ndarray)
+    """
+    n_drives = len(descriptions)
+    extra_point_mask = np.zeros(n_drives, dtype=bool)
+    two_point_mask = np.zeros(n_drives, dtype=bool)
+    touchdown_mask = np.zeros(n_drives, dtype=bool)
+    for i, desc in enumerate(descriptions):
+        if 'extra point is GOOD' in desc:
+            extra_point_mask[i] = True
+        two_point_at = desc.find('TWO-POINT CONV')
+        if two_point_at != -1:
+            succeeds_at = desc.find('SUCCEEDS')
+            if (desc.find('SUCCEEDS', two_point_at) != -1 and
+                    desc.find('REVERSED', succeeds_at) == -1 and
+                    desc.find('NULLIFIED', succeeds_at) == -1):
+                two_point_mask[i] = True
+        touchdown_at = desc.find('TOUCHDOWN')
+        if (touchdown_at != -1 and
+                desc.find('REVERSED', touchdown_at) == -1 and
+                desc.find('NULLIFIED', touchdown_at) == -1):
+            touchdown_mask[i] = True
+    return extra_point_mask, two_point_mask, touchdown_mask
+
+
+def mark_offensive_scores(df, extra_point_mask, two_point_mask):
     """Mark tds, field goals, extra points, and two-point conversions."""
-    df['expected_points'] = 0
+    # Flags are 0/1 and scores fit comfortably in float32; the narrow
+    # dtypes cut the frame's memory footprint, which is what the
+    # column-wise passes downstream are bound by.
+    df['expected_points'] = np.zeros(len(df), dtype=np.float32)
     df['offensive_points'] = 0
     td_mask = df['result'] == 'Touchdown'
     field_goal_mask = df['result'] == 'Field Goal'
-    extra_point_mask = df['last_play_desc'].str.contains('extra point is GOOD')
-    two_point_mask = (
-        (df['last_play_desc'].str.contains(r'TWO-POINT CONV.*SUCCEEDS')) &
-        (~df['last_play_desc'].str.contains(r'SUCCEEDS.*REVERSED')) &
-        (~df['last_play_desc'].str.contains(r'SUCCEEDS.*NULLIFIED'))
-    )
     df.loc[td_mask, 'expected_points'] = 7
     df.loc[td_mask, 'offensive_points'] += 6
     df.loc[field_goal_mask, 'offensive_points'] += 3
     df.loc[extra_point_mask, 'offensive_points'] += 1
     df.loc[two_point_mask, 'offensive_points'] += 2
-    df['is_touchdown'] = 0
-    df['is_field_goal'] = 0
-    df['is_score'] = 0
-    df.loc[td_mask, 'is_touchdown'] = 1
-    df.loc[field_goal_mask, 'is_field_goal'] = 1
-    df.loc[(td_mask) | (field_goal_mask), 'is_score'] = 1
+    df['is_touchdown'] = td_mask.astype(np.int8)
+    df['is_field_goal'] = field_goal_mask.astype(np.int8)
+    df['is_score'] = ((td_mask) | (field_goal_mask)).astype(np.int8)
     return df
 
 
-def mark_dst_scores(df):
+def mark_dst_scores(df, touchdown_mask):
     """Mark tds and safeties. Assume extra point made."""
     int_mask = df['result'] == 'Interception'
     fumble_mask = df['result'] == 'Fumble'
-    df['is_interception'] = 0
-    df.loc[int_mask, 'is_interception'] = 1
-    df['is_fumble'] = 0
-    df.loc[fumble_mask, 'is_fumble'] = 1
-    td_mask = (
-        (df['result'] != 'Touchdown') &
-        (df['last_play_desc'].str.contains(r'TOUCHDOWN')) &
-        (~df['last_play_desc'].str.contains(r'TOUCHDOWN.*REVERSED')) &
-        (~df['last_play_desc'].str.contains(r'TOUCHDOWN.*NULLIFIED'))
-    )
+    df['is_interception'] = int_mask.astype(np.int8)
+    df['is_fumble'] = fumble_mask.astype(np.int8)
+    td_mask = (df['result'] != 'Touchdown') & touchdown_mask
     safety_mask = df['result'].isin(['Safety', 'Fumble, Safety'])
-    df.loc[(int_mask) & (td_mask), 'result'] = 'Interception, Touchdown'
-    df.loc[(fumble_mask) & (td_mask), 'result'] = 'Fumble, Touchdown'
-    df.loc[(int_mask) & (td_mask), 'expected_points'] = -7
-    df.loc[(fumble_mask) & (td_mask), 'expected_points'] = -7
-    df.loc[safety_mask, 'expected_points'] = -2
+    # Chained where keeps result Arrow-backed; np.select would degrade
+    # the column to an object array.
+    df['result'] = df['result'].where(
+        ~((int_mask) & (td_mask)), 'Interception, Touchdown'
+    ).where(
+        ~((fumble_mask) & (td_mask)), 'Fumble, Touchdown'
+    )
+    df['expected_points'] = np.select(
+        [safety_mask, ((int_mask) | (fumble_mask)) & (td_mask)],
+        [np.float32(-2), np.float32(-7)],
+        default=df['expected_points']
+    )
     df['dst_points'] = 0
     df.loc[td_mask, 'dst_points'] += 7 # Assume extra point made...
     df.loc[safety_mask, 'dst_points'] += 2
     return df
 
 
+def grouped_cumsum(values, group_starts):
+    """Cumulative sum reset at each group boundary.
+
+    One full-array cumsum plus a per-group base subtraction replaces a
+    hashed groupby-transform; groups must occupy contiguous rows.
+
+    Arguments:
+        values (ndarray) - values to accumulate
+        group_starts (ndarray) - indices where a new group begins
+            (excluding row 0)
+    """
+    csum = np.cumsum(values)
+    group_ids = np.zeros(len(values), dtype=np.int64)
+    group_ids[group_starts] = 1
+    group_ids = np.cumsum(group_ids)
+    group_bases = np.concatenate(([0], csum[group_starts - 1]))
+    return csum - group_bases[group_ids]
+
+
 def get_current_score(df):
     """Get the current score of the drive."""
-    # Initialize series.
-    df['home_points'] = 0
-    df['away_points'] = 0
-    df['offensive_team_score_end'] = 0
-    df['defensive_team_score_end'] = 0
-    df['offensive_team_score_start'] = 0
-    df['defensive_team_score_start'] = 0
-    # Set masks.
-    home_o_mask = df['home_team'] == df['offensive_team']
-    away_o_mask = df['away_team'] == df['offensive_team']
-    home_d_mask = df['home_team'] == df['defensive_team']
-    away_d_mask = df['away_team'] == df['defensive_team']
+    # The defensive team is always the other side of the matchup, so
+    # one offense-is-home mask drives every home/away selection with
+    # np.where instead of eight boolean-indexed writes.
+    offense_home = (df['offensive_team'] == df['home_team']).to_numpy()
+    offensive_points = df['offensive_points'].to_numpy()
+    dst_points = df['dst_points'].to_numpy()
     # Mark current drive points.
-    df.loc[home_o_mask, 'home_points'] += df[home_o_mask]['offensive_points']
-    df.loc[home_d_mask, 'home_points'] += df[home_d_mask]['dst_points']
-    df.loc[away_o_mask, 'away_points'] += df[away_o_mask]['offensive_points']
-    df.loc[away_d_mask, 'away_points'] += df[away_d_mask]['dst_points']
-    # Mark score at end of current drive.
-    df['home_score_end'] = (
-        df.groupby('game_id')['home_points'].transform('cumsum')
-    )
-    df['away_score_end'] = (
-        df.groupby('game_id')['away_points'].transform('cumsum')
+    df['home_points'] = np.where(offense_home, offensive_points, dst_points)
+    df['away_points'] = np.where(offense_home, dst_points, offensive_points)
+    # Mark score at end of current drive. Games are contiguous after
+    # the mark_playoffs sort, so the per-game running score is a plain
+    # cumsum reset at each game boundary.
+    game_ids = df['game_id'].to_numpy()
+    game_starts = np.flatnonzero(game_ids[1:] != game_ids[:-1]) + 1
+    home_score_end = grouped_cumsum(df['home_points'].to_numpy(), game_starts)
+    away_score_end = grouped_cumsum(df['away_points'].to_numpy(), game_starts)
+    df['home_score_end'] = home_score_end
+    df['away_score_end'] = away_score_end
+    df['offensive_team_score_end'] = np.where(
+        offense_home, home_score_end, away_score_end
     )
-    df.loc[home_o_mask, 'offensive_team_score_end'] = (
-        df[home_o_mask]['home_score_end']
-    )
-    df.loc[away_o_mask, 'offensive_team_score_end'] = (
-        df[away_o_mask]['away_score_end']
-    )
-    df.loc[home_d_mask, 'defensive_team_score_end'] = (
-        df[home_d_mask]['home_score_end']
-    )
-    df.loc[away_d_mask, 'defensive_team_score_end'] = (
-        df[away_d_mask]['away_score_end']
+    df['defensive_team_score_end'] = np.where(
+        offense_home, away_score_end, home_score_end
     )
     # Mark score at start of current drive.
     df['home_score_start'] = df['home_score_end'] - df['home_points']
@@ -332,15 +580,58 @@ def format_final_scores(df):
 
 
 def add_field_goal_points(df):
-    df['made_field_goal'] = 0
-    df.loc[df['result'] == 'Field Goal', 'made_field_goal'] = 1
-    field_goal_mask = df['result'].isin(['Field Goal', 'Missed FG', 'Blocked FG', 'Blocked FG, Downs'])
-    field_goal_agg = df.loc[field_goal_mask].groupby('end_yard_line_bin')
-    df.loc[field_goal_mask, 'expected_points'] = field_goal_agg['made_field_goal'].transform('mean') * 3
-    df = df.drop('made_field_goal', axis=1)
+    # Expected points on a field goal drive are 3 times the make rate
+    # of attempts ending in the same yard line bin. Two bincount passes
+    # over just the attempt rows replace the filtered groupby
+    # transform, reusing the is_field_goal flag as the made indicator.
+    attempt_mask = df['result'].isin(
+        ['Field Goal', 'Missed FG', 'Blocked FG', 'Blocked FG, Downs']
+    ).to_numpy()
+    end_codes = df['end_yard_line_bin'].cat.codes.to_numpy()[attempt_mask]
+    made = df['is_field_goal'].to_numpy(dtype=float)[attempt_mask]
+    rates = binned_means(end_codes, made)
+    expected_points = df['expected_points'].to_numpy(copy=True)
+    expected_points[attempt_mask] = broadcast_binned_means(
+        rates * 3, end_codes
+    )
+    df['expected_points'] = expected_points
     return df
 
 
+def binned_means(bin_codes, values):
+    """Mean of values within each of the ten yard line bins.
+
+    Equivalent to a groupby mean on the bin column, but all three mean
+    aggregations in add_field_position_points reuse the same categorical
+    codes instead of each rebuilding a group index: one bincount pass
+    sums and counts per bin. NaN values are skipped and bins with no
+    valid rows stay NaN, matching groupby semantics; code -1 marks rows
+    whose yard line fell outside the bins.
+
+    Arguments:
+        bin_codes (ndarray) - yard line bin code per drive; -1 for NaN
+        values (ndarray) - values to average within each bin
+
+    Returns:
+        means (ndarray) - mean value per bin code
+    """
+    valid = (bin_codes >= 0) & ~np.isnan(values)
+    sums = np.bincount(
+        bin_codes[valid], weights=values[valid], minlength=len(BIN_LABELS)
+    )
+    counts = np.bincount(bin_codes[valid], minlength=len(BIN_LABELS))
+    return np.divide(
+        sums, counts, out=np.full(len(BIN_LABELS), np.nan), where=counts > 0
+    )
+
+
+def broadcast_binned_means(means, bin_codes):
+    # Broadcast per-bin means back onto rows; unbinned rows get NaN.
+    values = means[np.clip(bin_codes, 0, None)]
+    values[bin_codes < 0] = np.nan
+    return values
+
+
 def add_field_position_points(df):
     """Add or subtract points based on field position changes.
 
@@ -350,20 +641,30 @@ def add_field_position_points(df):
     4. How many expected points is that worth?
     5. What is the change in your opponents expected points on their next drive?
     """
-    df['start_opp_expected_start'] = df.groupby('start_yard_line_bin')\
-        ['next_start_yard_line'].transform('mean')
-    df['end_opp_expected_start'] = df.groupby('end_yard_line_bin')\
-        ['next_start_yard_line'].transform('mean')
+    start_codes = df['start_yard_line_bin'].cat.codes.to_numpy()
+    end_codes = df['end_yard_line_bin'].cat.codes.to_numpy()
+    next_start = df['next_start_yard_line'].to_numpy(dtype=float)
+    df['start_opp_expected_start'] = broadcast_binned_means(
+        binned_means(start_codes, next_start), start_codes
+    )
+    df['end_opp_expected_start'] = broadcast_binned_means(
+        binned_means(end_codes, next_start), end_codes
+    )
     df = bin_yard_lines(
         df, binned_column='start_opp_expected_start', prefix='start_opp_expected'
     )
     df = bin_yard_lines(
         df, binned_column='end_opp_expected_start', prefix='end_opp_expected'
     )
-    nfl_agg = df.groupby('start_yard_line_bin')['expected_points'].mean()
-    nfl_agg = nfl_agg.to_dict()
-    df['expected_points_opp_from_start'] = df['start_opp_expected_yard_line_bin'].map(nfl_agg)
-    df['expected_points_opp_from_end'] = df['end_opp_expected_yard_line_bin'].map(nfl_agg)
+    nfl_means = binned_means(
+        start_codes, df['expected_points'].to_numpy(dtype=float)
+    )
+    df['expected_points_opp_from_start'] = broadcast_binned_means(
+        nfl_means, df['start_opp_expected_yard_line_bin'].cat.codes.to_numpy()
+    )
+    df['expected_points_opp_from_end'] = broadcast_binned_means(
+        nfl_means, df['end_opp_expected_yard_line_bin'].cat.codes.to_numpy()
+    )
     df['field_position_points'] = (
         df['expected_points_opp_from_start'] - df['expected_points_opp_from_end']
     )
@@ -377,17 +678,20 @@ def add_field_position_points(df):
 
 
 def add_win_loss(df):
-    df['offensive_win'] = (
-        (df['offensive_team'] == df['home_team']).astype(int) *
-        (df['home_final_score'] > df['away_final_score']).astype(int) +
-        (df['offensive_team'] == df['away_team']).astype(int) *
-       ( df['away_final_score'] > df['home_final_score']).astype(int)
+    # One signed score differential replaces the four boolean products,
+    # and the flags land as int8 instead of int64.
+    score_diff = (
+        df['home_final_score'].to_numpy(dtype=np.int16) -
+        df['away_final_score'].to_numpy(dtype=np.int16)
     )
+    offense_home = (df['offensive_team'] == df['home_team']).to_numpy()
+    df['offensive_win'] = (
+        ((offense_home) & (score_diff > 0)) |
+        ((~offense_home) & (score_diff < 0))
+    ).astype(np.int8)
     df['defensive_win'] = (
-        (df['defensive_team'] == df['home_team']).astype(int) *
-        (df['home_final_score'] > df['away_final_score']).astype(int) +
-        (df['defensive_team'] == df['away_team']).astype(int) *
-       ( df['away_final_score'] > df['home_final_score']).astype(int)
-    )
-    df['tie'] = (df['offensive_win'] + df['defensive_win'] == 0).astype(int)
+        ((~offense_home) & (score_diff > 0)) |
+        ((offense_home) & (score_diff < 0))
+    ).astype(np.int8)
+    df['tie'] = (score_diff == 0).astype(np.int8)
     return df